@@ -381,7 +381,7 @@ struct CloudBookMetadata: Codable, Identifiable {
     
     // Cloud-specific fields
     let storageUrl: String  // Firebase Storage path: "epubs/book-id.epub"
-    let coverImageUrl: String?  // Local bundled cover path (e.g., "BookCovers/book-id.png") or remote URL
+    let coverImageUrl: String?  // Local bundled cover path (e.g., "BookCovers/book-id.jpg") or remote URL
     let fileSizeBytes: Int
     let isFeatured: Bool  // True if bundled in app as starter content
     
@@ -467,8 +467,8 @@ struct ShelfView: View {
                     
                     // Reconstruct cover URL if needed
                     if needsCoverReconstruction {
-                        // Use bundled cover (matches catalog naming: bookId.png)
-                        coverUrl = "BookCovers/\(bookId).png"
+                        // Use bundled cover (matches catalog naming: bookId.jpg, or bookId.png for older covers)
+                        coverUrl = ShelfBook.bundledCoverPath(for: bookId) ?? "BookCovers/\(bookId).jpg"
                         print("   - Reconstructing cover path: \(coverUrl!)")
                         
                         // Update Firebase with corrected coverUrl
@@ -568,6 +568,18 @@ struct ShelfBook: Identifiable {
             chapters: []
         )
     }
+    
+    /// Bundled cover path relative to the bundle ("BookCovers/bookId.jpg", or .png for older covers), if one exists
+    static func bundledCoverPath(for bookId: String) -> String? {
+        guard let bundleResourcePath = Bundle.main.resourcePath else { return nil }
+        for ext in ["jpg", "png"] {
+            let coverPath = "BookCovers/\(bookId).\(ext)"
+            if FileManager.default.fileExists(atPath: (bundleResourcePath as NSString).appendingPathComponent(coverPath)) {
+                return coverPath
+            }
+        }
+        return nil
+    }
 }
 
 // MARK: - User Book Model (imported)
@@ -614,25 +626,14 @@ struct ShelfBookCard: View {
                                     .clipped()
                             } else {
                                 // File doesn't exist (stale path) - try bundled cover instead
-                                if let bundlePath = Bundle.main.path(forResource: "BookCovers/\(book.bookId)", ofType: "png"),
-                                   let image = UIImage(contentsOfFile: bundlePath) {
+                                if let coverPath = ShelfBook.bundledCoverPath(for: book.bookId),
+                                   let bundleResourcePath = Bundle.main.resourcePath,
+                                   let image = UIImage(contentsOfFile: (bundleResourcePath as NSString).appendingPathComponent(coverPath)) {
                                     Image(uiImage: image)
                                         .resizable()
                                         .aspectRatio(contentMode: .fill)
                                         .frame(width: geometry.size.width, height: geometry.size.height)
                                         .clipped()
-                                } else if let bundleResourcePath = Bundle.main.resourcePath {
-                                    let fullPath = (bundleResourcePath as NSString).appendingPathComponent("BookCovers/\(book.bookId).png")
-                                    if let image = UIImage(contentsOfFile: fullPath) {
-                                        Image(uiImage: image)
-                                            .resizable()
-                                            .aspectRatio(contentMode: .fill)
-                                            .frame(width: geometry.size.width, height: geometry.size.height)
-                                            .clipped()
-                                    } else {
-                                        Rectangle()
-                                            .fill(Color(hex: getRandomColor()))
-                                    }
                                 } else {
                                     Rectangle()
                                         .fill(Color(hex: getRandomColor()))
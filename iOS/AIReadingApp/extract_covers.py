@@ -4,179 +4,284 @@ Extract Book Covers from EPUBs
 ===============================
 
 This script extracts cover images from all EPUB files and saves them
-as PNG files that can be bundled in your iOS app for offline display.
+as JPEG files that can be bundled in your iOS app for offline display.
 
 Usage:
     python3 extract_covers.py --epubs-dir "./Bundle Books" --output-dir "./BookCovers"
 
 Requirements:
-    pip install ebooklib Pillow
+    pip install Pillow numpy
+
+    For faster cover resizing, Pillow-SIMD is a drop-in replacement with
+    SSE4/AVX2 resampling kernels (same API, no code changes):
+    pip uninstall pillow && pip install pillow-simd
 """
 
 import argparse
+import functools
+import hashlib
+import json
 import os
+import posixpath
 import shutil
+import textwrap
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from PIL import Image
+from typing import IO, List, Optional, Tuple, Union
+from urllib.parse import unquote
+from xml.sax.saxutils import escape
+from PIL import Image, ImageDraw, ImageFont
+from PIL import __version__ as PILLOW_VERSION
 import io
+import numpy as np
+
+# XML namespaces used by EPUB container and package (OPF) documents
+CONTAINER_NS = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+OPF_NS = "{http://www.idpf.org/2007/opf}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
+
+# Sidecar file recording which EPUB each cover was made from. It is kept in the
+# EPUB directory: the output directory is bundled into the app as a folder reference.
+MANIFEST_NAME = ".covers.manifest.json"
+
+# Bump when the fingerprint format or cover pipeline changes, so old entries are discarded
+MANIFEST_VERSION = 1
+
+
+@functools.lru_cache(maxsize=8)
+def _font(size: int) -> ImageFont.ImageFont:
+    """Load (once per size) the font used for placeholder cover text."""
+    try:
+        return ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _warn(warnings: Optional[List[str]], message: str):
+    """Collect a warning for the caller to report, or print it if no list is given."""
+    if warnings is None:
+        print(f"   ⚠️  {message}")
+    else:
+        warnings.append(message)
+
+
+def _open_epub_zip(epub_path: Path) -> zipfile.ZipFile:
+    """Open an EPUB file as a zip archive."""
+    return zipfile.ZipFile(epub_path)
+
+
+def _read_opf(zf: zipfile.ZipFile) -> Tuple[ET.Element, str]:
+    """
+    Locate and parse the package (OPF) document of an open EPUB.
+    Returns (opf_root, opf_dir), where opf_dir is the directory that
+    manifest hrefs are relative to.
+    """
+    container = ET.fromstring(zf.read("META-INF/container.xml"))
+    rootfile = container.find(f".//{CONTAINER_NS}rootfile")
+    opf_path = rootfile.get("full-path")
+    opf_root = ET.fromstring(zf.read(opf_path))
+    return opf_root, posixpath.dirname(opf_path)
+
+
+def _read_title_author(opf_root: ET.Element) -> Tuple[Optional[str], Optional[str]]:
+    """Read DC title and creator from a parsed OPF document."""
+    title = opf_root.findtext(f".//{DC_NS}title")
+    author = opf_root.findtext(f".//{DC_NS}creator")
+    return title, author
+
+
+def _is_image_item(item: ET.Element) -> bool:
+    """Whether a manifest <item> is an image."""
+    return (item.get("media-type") or "").startswith("image/")
+
 
-try:
-    import ebooklib
-    from ebooklib import epub
-    EBOOKLIB_AVAILABLE = True
-except ImportError:
-    EBOOKLIB_AVAILABLE = False
-    print("❌ Error: ebooklib not installed")
-    print("   Install with: pip install ebooklib Pillow")
-    exit(1)
+def _resolve_href(opf_dir: str, href: str) -> str:
+    """Turn a manifest href (URL-encoded, relative to the OPF) into a zip entry name."""
+    return posixpath.normpath(posixpath.join(opf_dir, unquote(href)))
 
 
-def extract_cover_from_epub(epub_path: Path) -> bytes:
+def extract_cover_from_epub(zf: zipfile.ZipFile, opf_root: ET.Element, opf_dir: str,
+                            warnings: Optional[List[str]] = None) -> Optional[IO[bytes]]:
     """
-    Extract cover image from EPUB file.
-    Returns image data as bytes, or None if not found.
+    Extract cover image from an open EPUB using its parsed OPF document.
+    Returns the zip entry opened for streaming reads (valid while zf is
+    open; the caller closes it), or None if not found.
     """
     try:
-        book = epub.read_epub(str(epub_path))
+        manifest = opf_root.find(f"{OPF_NS}manifest")
+        if manifest is None:
+            return None
         
-        # Method 1: Try to get cover image directly
-        cover_image = None
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_COVER:
-                cover_image = item.get_content()
+        # EPUB 2: resolve <meta name="cover" content="ID"/> straight to its manifest item
+        cover_by_id = None
+        for meta in opf_root.iter(f"{OPF_NS}meta"):
+            if meta.get("name") == "cover":
+                item = manifest.find(f"{OPF_NS}item[@id='{meta.get('content', '')}']")
+                # Some EPUBs point this at the XHTML cover page rather than the image
+                if item is not None and _is_image_item(item):
+                    cover_by_id = item
                 break
         
-        if cover_image:
-            return cover_image
-        
-        # Method 2: Look for cover in metadata
-        cover_meta = book.get_metadata('OPF', 'cover')
-        if cover_meta:
-            cover_id = cover_meta[0][1].get('content', '')
-            for item in book.get_items():
-                if item.get_id() == cover_id:
-                    cover_image = item.get_content()
-                    break
-        
-        if cover_image:
-            return cover_image
-        
-        # Method 3: Look for common cover filenames
         cover_names = ['cover.jpg', 'cover.jpeg', 'cover.png', 'cover.gif',
                       'Cover.jpg', 'Cover.png', 'COVER.JPG', 'COVER.PNG']
         
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_IMAGE:
-                # Check if filename contains 'cover'
-                if any(name in item.get_name() for name in cover_names):
-                    cover_image = item.get_content()
-                    break
-                # Check if 'cover' is in the path
-                if 'cover' in item.get_name().lower():
-                    cover_image = item.get_content()
-                    break
-        
-        if cover_image:
-            return cover_image
-        
-        # Method 4: Use first image if nothing else found
-        for item in book.get_items():
-            if item.get_type() == ebooklib.ITEM_IMAGE:
-                cover_image = item.get_content()
+        # Single pass over the manifest's image items (nothing is decompressed here)
+        cover_by_type = None   # Method 1: EPUB 3 cover-image manifest property
+        cover_by_name = None   # Method 3: common cover filenames
+        first_image = None     # Method 4: first image in the manifest
+        for item in manifest.iterfind(f"{OPF_NS}item"):
+            if not _is_image_item(item):
+                continue
+            if "cover-image" in (item.get("properties") or "").split():
+                cover_by_type = item
                 break
+            # Filename heuristics are only needed when the OPF declares no cover
+            if cover_by_id is not None:
+                continue
+            if first_image is None:
+                first_image = item
+            if cover_by_name is None:
+                href = item.get("href", "")
+                # Check if filename contains 'cover', or 'cover' is in the path
+                if any(name in href for name in cover_names) or 'cover' in href.lower():
+                    cover_by_name = item
+        
+        # Elements without children are falsy, so compare against None explicitly
+        candidates = (cover_by_type, cover_by_id, cover_by_name, first_image)
+        cover_item = next((c for c in candidates if c is not None), None)
+        if cover_item is None:
+            return None
         
-        return cover_image
+        # Only the winning entry is decompressed, lazily as it is read
+        return zf.open(_resolve_href(opf_dir, cover_item.get("href")), 'r')
         
     except Exception as e:
-        print(f"   ⚠️  Error extracting cover: {e}")
+        _warn(warnings, f"Error extracting cover: {e}")
         return None
 
 
-def resize_and_optimize_cover(image_data: bytes, max_width: int = 300, max_height: int = 450) -> bytes:
+def resize_and_optimize_cover(image_data: Union[bytes, IO[bytes]], max_width: int = 300,
+                              max_height: int = 450, warnings: Optional[List[str]] = None) -> Optional[bytes]:
     """
     Resize and optimize cover image for mobile display.
     Maintains aspect ratio while fitting within max dimensions.
+    Returns JPEG bytes, or None if the image can't be decoded.
+    image_data may be bytes or a seekable binary file (e.g. an open zip
+    entry), which Pillow then decodes without holding the whole file in memory.
     """
+    src = image_data if hasattr(image_data, 'read') else io.BytesIO(image_data)
     try:
         # Open image
-        img = Image.open(io.BytesIO(image_data))
+        img = Image.open(src)
         
-        # Convert to RGB if necessary (for PNG with transparency)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
+        # Already a small JPEG: keep the original bytes (only the header has been read so far)
+        if img.width <= max_width and img.height <= max_height and img.format == 'JPEG':
+            src.seek(0)
+            original = src.read(80_000)
+            if len(original) < 80_000:
+                return original
+        
+        # For JPEG sources, let libjpeg decode at a reduced DCT scale (no-op for other formats)
+        try:
+            img.draft('RGB', (max_width * 2, max_height * 2))
+        except Exception:
+            pass
+        
+        # Convert to RGB if necessary (flatten PNG transparency onto white)
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        if img.mode in ('RGBA', 'LA'):
+            background = Image.new('RGBA', img.size, (255, 255, 255, 255))
+            img = Image.alpha_composite(background, img.convert('RGBA')).convert('RGB')
         
         # Calculate new size maintaining aspect ratio
         img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
         
-        # Save as PNG
+        # JPEG only supports a few modes (e.g. not 16-bit grayscale)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        
+        # Save as JPEG
         output = io.BytesIO()
-        img.save(output, format='PNG', optimize=True)
+        img.save(output, format='JPEG', quality=85, optimize=True, progressive=True)
         return output.getvalue()
         
     except Exception as e:
-        print(f"   ⚠️  Error resizing image: {e}")
-        return image_data
+        _warn(warnings, f"Error resizing image: {e}")
+        # Output is always JPEG, so undecodable data (e.g. SVG covers) falls back to a placeholder
+        return None
+
+
+# Placeholder gradient (top, bottom) colors
+PLACEHOLDER_COLORS = [
+    [(139, 92, 246), (124, 58, 237)],  # Purple
+    [(236, 72, 153), (219, 39, 119)],  # Pink
+    [(16, 185, 129), (5, 150, 105)],   # Green
+    [(245, 158, 11), (217, 119, 6)],   # Orange
+    [(59, 130, 246), (37, 99, 235)],   # Blue
+    [(239, 68, 68), (220, 38, 38)],    # Red
+]
 
 
-def create_placeholder_cover(book_id: str, title: str, author: str, width: int = 300, height: int = 450) -> bytes:
+@functools.lru_cache(maxsize=16)
+def _gradient(color_index: int, width: int, height: int) -> np.ndarray:
+    """
+    Render (once per color and size) a placeholder gradient background
+    as a (height, width, 3) uint8 array. Callers must not modify it.
+    """
+    color_pair = PLACEHOLDER_COLORS[color_index]
+    
+    # One color per row, broadcast across the width
+    ratios = (np.arange(height, dtype=np.float32) / height)[:, None]
+    c0 = np.array(color_pair[0], dtype=np.float32)
+    c1 = np.array(color_pair[1], dtype=np.float32)
+    row_colors = (c0 + (c1 - c0) * ratios).astype(np.uint8)  # (height, 3)
+    return np.broadcast_to(row_colors[:, None, :], (height, width, 3)).copy()
+
+
+def create_placeholder_cover(book_id: str, title: str, author: str, width: int = 300, height: int = 450,
+                             warnings: Optional[List[str]] = None) -> bytes:
     """
     Create a placeholder cover image with gradient and text.
     """
     try:
-        from PIL import ImageDraw, ImageFont
+        # Choose color based on a stable hash of book_id (hash() is randomized per process)
+        color_index = zlib.crc32(book_id.encode('utf-8')) % len(PLACEHOLDER_COLORS)
         
-        # Create gradient background
-        img = Image.new('RGB', (width, height))
+        # Copy the cached gradient so drawing this book's text doesn't touch the cache
+        gradient = _gradient(color_index, width, height).copy()
+        img = Image.fromarray(gradient, 'RGB')
         draw = ImageDraw.Draw(img)
         
-        # Choose color based on book_id hash
-        colors = [
-            [(139, 92, 246), (124, 58, 237)],  # Purple
-            [(236, 72, 153), (219, 39, 119)],  # Pink
-            [(16, 185, 129), (5, 150, 105)],   # Green
-            [(245, 158, 11), (217, 119, 6)],   # Orange
-            [(59, 130, 246), (37, 99, 235)],   # Blue
-            [(239, 68, 68), (220, 38, 38)],    # Red
-        ]
-        
-        color_pair = colors[abs(hash(book_id)) % len(colors)]
-        
-        # Draw gradient
-        for y in range(height):
-            ratio = y / height
-            r = int(color_pair[0][0] + (color_pair[1][0] - color_pair[0][0]) * ratio)
-            g = int(color_pair[0][1] + (color_pair[1][1] - color_pair[0][1]) * ratio)
-            b = int(color_pair[0][2] + (color_pair[1][2] - color_pair[0][2]) * ratio)
-            draw.line([(0, y), (width, y)], fill=(r, g, b))
-        
         # Add book icon and text
-        # Try to load a system font
-        try:
-            title_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 24)
-            author_font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 16)
-        except:
-            title_font = ImageFont.load_default()
-            author_font = ImageFont.load_default()
+        title_font = _font(24)
+        author_font = _font(16)
         
         # Draw title (centered, with word wrap)
+        # Each word is measured once up front; line widths are sums of word and space advances
         title_lines = []
         words = title.split()
-        current_line = ""
-        for word in words:
-            test_line = current_line + " " + word if current_line else word
-            bbox = draw.textbbox((0, 0), test_line, font=title_font)
-            if bbox[2] - bbox[0] <= width - 40:
-                current_line = test_line
+        word_widths = [title_font.getlength(word) for word in words]
+        space_width = title_font.getlength(" ")
+        max_line_width = width - 40
+        current_words = []
+        current_width = 0.0
+        for word, word_width in zip(words, word_widths):
+            test_width = current_width + (space_width if current_words else 0) + word_width
+            if test_width <= max_line_width:
+                current_words.append(word)
+                current_width = test_width
             else:
-                if current_line:
-                    title_lines.append(current_line)
-                current_line = word
-        if current_line:
-            title_lines.append(current_line)
+                if current_words:
+                    title_lines.append(" ".join(current_words))
+                current_words = [word]
+                current_width = word_width
+        if current_words:
+            title_lines.append(" ".join(current_words))
         
         # Limit to 3 lines
         title_lines = title_lines[:3]
@@ -197,33 +302,185 @@ def create_placeholder_cover(book_id: str, title: str, author: str, width: int =
             x = (width - text_width) // 2
             draw.text((x, y_offset + 20), author, fill=(255, 255, 255, 200), font=author_font)
         
-        # Save as PNG
+        # Save as JPEG (smooth gradients compress well)
         output = io.BytesIO()
-        img.save(output, format='PNG', optimize=True)
+        img.save(output, format='JPEG', quality=85, optimize=True, progressive=True)
         return output.getvalue()
         
     except Exception as e:
-        print(f"   ⚠️  Error creating placeholder: {e}")
+        _warn(warnings, f"Error creating placeholder: {e}")
         # Return a simple colored rectangle as fallback
         img = Image.new('RGB', (width, height), (100, 100, 150))
         output = io.BytesIO()
-        img.save(output, format='PNG')
+        img.save(output, format='JPEG', quality=85)
         return output.getvalue()
 
 
-def extract_all_covers(epubs_dir: Path, output_dir: Path, create_placeholders: bool = True):
+def _epub_fingerprint(epub_file: Path, st: Optional[os.stat_result] = None) -> List:
+    """
+    Identify an EPUB's contents cheaply: [mtime_ns, size, sha1 of the first 64 KB].
+    Returned as a list so it compares equal to its JSON round-trip.
+    """
+    if st is None:
+        st = epub_file.stat()
+    with open(epub_file, 'rb') as f:
+        head_hash = hashlib.sha1(f.read(65536)).hexdigest()
+    return [st.st_mtime_ns, st.st_size, head_hash]
+
+
+def _scan_epubs(epubs_dir: Path) -> List[os.DirEntry]:
+    """
+    List EPUB files in a directory, sorted by name. Dotfiles (e.g. macOS
+    ._name.epub AppleDouble files) are skipped. is_file() comes from the
+    directory listing for free; DirEntry.stat() still makes one stat call
+    on Linux (cached on the entry afterwards).
+    """
+    entries = [e for e in os.scandir(epubs_dir)
+               if e.is_file() and e.name.lower().endswith(".epub") and not e.name.startswith(".")]
+    return sorted(entries, key=lambda e: e.name)
+
+
+def _load_manifest(manifest_file: Path) -> dict:
+    """Load the covers manifest, or an empty one if missing, unreadable or from another version."""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("books", {})
+
+
+def _save_manifest(manifest_file: Path, manifest: dict):
+    """Write the covers manifest along with its version."""
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({"version": MANIFEST_VERSION, "books": manifest}, f, indent=2, sort_keys=True)
+
+
+def create_placeholder_svg(book_id: str, title: str, author: str, width: int = 300, height: int = 450) -> bytes:
+    """
+    Create a placeholder cover as SVG: the same gradient and text layout as
+    create_placeholder_cover, in a few hundred bytes and with no rasterizing.
+    """
+    top, bottom = PLACEHOLDER_COLORS[zlib.crc32(book_id.encode('utf-8')) % len(PLACEHOLDER_COLORS)]
+    
+    # Wrap title at ~20 characters, limited to 3 lines
+    title_lines = textwrap.wrap(title, 20)[:3]
+    
+    # Text y is the baseline, so offset each line by its font size
+    parts = []
+    y_offset = height // 2 - (len(title_lines) * 30) // 2
+    for line in title_lines:
+        parts.append(f'<text x="{width // 2}" y="{y_offset + 24}" font-size="24">{escape(line)}</text>')
+        y_offset += 35
+    if author and author != "Unknown":
+        parts.append(f'<text x="{width // 2}" y="{y_offset + 20 + 16}" font-size="16" '
+                     f'fill-opacity="0.8">{escape(author)}</text>')
+    
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<defs><linearGradient id="g" x1="0" y1="0" x2="0" y2="1">'
+        f'<stop offset="0" stop-color="rgb{top}"/><stop offset="1" stop-color="rgb{bottom}"/>'
+        f'</linearGradient></defs>'
+        f'<rect width="100%" height="100%" fill="url(#g)"/>'
+        f'<g font-family="Helvetica, Arial, sans-serif" fill="#fff" text-anchor="middle">'
+        f'{"".join(parts)}</g></svg>'
+    )
+    return svg.encode('utf-8')
+
+
+def _write_file(path: Path, data: bytes):
+    """Write already-encoded bytes with a raw fd (no buffered file object per cover)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _process_one(epub_file: Path, output_dir: Path, create_placeholders: bool,
+                 svg_placeholders: bool = False) -> Tuple[str, str, Union[int, str, None], List[str]]:
+    """
+    Extract (or create a placeholder for) the cover of a single EPUB.
+    Runs in a worker process, so results and warnings are returned for the
+    parent to print next to the book: (epub name, status, detail, warnings)
+    where status is one of "extracted", "placeholder", "missing", "failed"
+    or "unreadable" and detail is the written file size or the error message.
+    """
+    book_id = epub_file.stem.lower()
+    output_file = output_dir / f"{book_id}.jpg"
+    warnings = []
+    
+    try:
+        # Open the EPUB once and reuse it for both the cover and the metadata
+        optimized_cover = None
+        with _open_epub_zip(epub_file) as zf:
+            opf_root, opf_dir = _read_opf(zf)
+            cover_stream = extract_cover_from_epub(zf, opf_root, opf_dir, warnings)
+            if cover_stream is not None:
+                # Resize and optimize, streaming straight from the zip entry
+                with cover_stream:
+                    optimized_cover = resize_and_optimize_cover(cover_stream, warnings=warnings)
+    except Exception as e:
+        return epub_file.name, "unreadable", str(e), warnings
+    
+    if optimized_cover:
+        # Save to file
+        _write_file(output_file, optimized_cover)
+        
+        return epub_file.name, "extracted", len(optimized_cover), warnings
+    
+    if not create_placeholders:
+        return epub_file.name, "missing", None, warnings
+    
+    # Create placeholder cover
+    try:
+        # Get title and author
+        title, author = _read_title_author(opf_root)
+        title = title or epub_file.stem.replace("-", " ").title()
+        author = author or "Unknown"
+        
+        if svg_placeholders:
+            placeholder_data = create_placeholder_svg(book_id, title, author)
+            output_file = output_file.with_suffix(".svg")
+        else:
+            placeholder_data = create_placeholder_cover(book_id, title, author, warnings=warnings)
+        
+        _write_file(output_file, placeholder_data)
+        
+        return epub_file.name, "placeholder", len(placeholder_data), warnings
+        
+    except Exception as e:
+        return epub_file.name, "failed", str(e), warnings
+
+
+def extract_all_covers(epubs_dir: Path, output_dir: Path, create_placeholders: bool = True,
+                       svg_placeholders: bool = False, force: bool = False):
     """
     Extract covers from all EPUB files and save to output directory.
+    EPUBs are processed in parallel, one worker process per CPU core.
+    With svg_placeholders, placeholders are written as SVG instead of JPEG.
+    With force, existing covers and the manifest are ignored and every cover is redone.
     """
     print(f"📚 Scanning EPUBs in: {epubs_dir}")
     print(f"💾 Output directory: {output_dir}")
+    # Pillow-SIMD releases carry a .postN version suffix
+    if 'post' in PILLOW_VERSION:
+        print(f"🖼️  Pillow {PILLOW_VERSION} (SIMD build)")
+    else:
+        print(f"🖼️  Pillow {PILLOW_VERSION} (install pillow-simd for faster resizing)")
     print()
     
     # Create output directory if it doesn't exist
     output_dir.mkdir(parents=True, exist_ok=True)
     
     # Find all EPUB files
-    epub_files = list(epubs_dir.glob("*.epub"))
+    epub_entries = _scan_epubs(epubs_dir)
+    epub_files = [Path(e.path) for e in epub_entries]
     
     if not epub_files:
         print(f"❌ No EPUB files found in {epubs_dir}")
@@ -232,65 +489,70 @@ def extract_all_covers(epubs_dir: Path, output_dir: Path, create_placeholders: b
     print(f"📖 Found {len(epub_files)} EPUB files")
     print()
     
-    # Process each EPUB
-    extracted_count = 0
-    placeholder_count = 0
+    # Skip books whose cover was already made from the same EPUB contents
+    manifest_file = epubs_dir / MANIFEST_NAME
+    previous_manifest = {} if force else _load_manifest(manifest_file)
+    # Only EPUBs still in the directory are carried over, so removed books drop out
+    book_ids = {epub_file.stem.lower() for epub_file in epub_files}
+    manifest = {book_id: fp for book_id, fp in previous_manifest.items() if book_id in book_ids}
+    
+    # Earlier versions wrote the manifest into the (bundled) output directory
+    legacy_manifest_file = output_dir / MANIFEST_NAME
+    if legacy_manifest_file.exists():
+        legacy_manifest_file.unlink()
     
-    for epub_file in sorted(epub_files):
-        # Generate book ID from filename
+    pending = []
+    skipped = set()
+    fingerprints = {}
+    for epub_file, entry in zip(epub_files, epub_entries):
         book_id = epub_file.stem.lower()
-        output_file = output_dir / f"{book_id}.png"
-        
-        print(f"Processing: {epub_file.name}")
-        
-        # Skip if already exists
-        if output_file.exists():
-            print(f"  ⏭️  Cover already exists, skipping")
+        output_file = output_dir / f"{book_id}.jpg"
+        fingerprint = _epub_fingerprint(epub_file, entry.stat())
+        fingerprints[book_id] = fingerprint
+        # Covers from earlier runs may still be PNG, and placeholders may be SVG
+        cover_exists = any(output_file.with_suffix(ext).exists() for ext in (".jpg", ".png", ".svg"))
+        # Covers with no manifest record predate the manifest (or were added by hand): keep them
+        if not force and cover_exists and manifest.get(book_id, fingerprint) == fingerprint:
+            skipped.add(epub_file)
+            manifest[book_id] = fingerprint
             continue
-        
-        # Extract cover
-        cover_data = extract_cover_from_epub(epub_file)
-        
-        if cover_data:
-            # Resize and optimize
-            optimized_cover = resize_and_optimize_cover(cover_data)
-            
-            # Save to file
-            with open(output_file, 'wb') as f:
-                f.write(optimized_cover)
-            
-            # Get file size
-            file_size = os.path.getsize(output_file)
-            print(f"  ✅ Extracted cover ({file_size:,} bytes)")
-            extracted_count += 1
-            
-        elif create_placeholders:
-            # Create placeholder cover
-            try:
-                import ebooklib
-                from ebooklib import epub
-                book = epub.read_epub(str(epub_file))
-                
-                # Get title and author
-                title_meta = book.get_metadata('DC', 'title')
-                title = title_meta[0][0] if title_meta else epub_file.stem.replace("-", " ").title()
-                
-                author_meta = book.get_metadata('DC', 'creator')
-                author = author_meta[0][0] if author_meta else "Unknown"
-                
-                placeholder_data = create_placeholder_cover(book_id, title, author)
-                
-                with open(output_file, 'wb') as f:
-                    f.write(placeholder_data)
-                
-                file_size = os.path.getsize(output_file)
-                print(f"  🎨 Created placeholder cover ({file_size:,} bytes)")
+        pending.append(epub_file)
+    
+    # Process each remaining EPUB
+    extracted_count = 0
+    placeholder_count = 0
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(
+            _process_one, pending, repeat(output_dir), repeat(create_placeholders),
+            repeat(svg_placeholders), chunksize=4
+        )
+        # Report in sorted order: skipped books inline, the others as their results arrive
+        for epub_file in epub_files:
+            print(f"Processing: {epub_file.name}")
+            if epub_file in skipped:
+                print(f"  ⏭️  Cover already exists, skipping")
+                continue
+            _, status, detail, warnings = next(results)
+            for warning in warnings:
+                print(f"   ⚠️  {warning}")
+            if status in ("extracted", "placeholder"):
+                book_id = epub_file.stem.lower()
+                manifest[book_id] = fingerprints[book_id]
+            if status == "extracted":
+                print(f"  ✅ Extracted cover ({detail:,} bytes)")
+                extracted_count += 1
+            elif status == "placeholder":
+                print(f"  🎨 Created placeholder cover ({detail:,} bytes)")
                 placeholder_count += 1
-                
-            except Exception as e:
-                print(f"  ❌ Failed to create placeholder: {e}")
-        else:
-            print(f"  ⚠️  No cover found")
+            elif status == "failed":
+                print(f"  ❌ Failed to create placeholder: {detail}")
+            elif status == "unreadable":
+                print(f"  ❌ Could not read EPUB: {detail}")
+            else:
+                print(f"  ⚠️  No cover found")
+    
+    _save_manifest(manifest_file, manifest)
     
     print()
     print("=" * 60)
@@ -331,6 +593,16 @@ def main():
         action="store_true",
         help="Don't create placeholder covers for books without covers"
     )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Redo every cover, ignoring existing covers and the manifest of unchanged EPUBs"
+    )
+    parser.add_argument(
+        "--svg-placeholders",
+        action="store_true",
+        help="Write placeholder covers as SVG instead of JPEG (needs an SVG-capable image loader in the app)"
+    )
     
     args = parser.parse_args()
     
@@ -340,7 +612,8 @@ def main():
         return 1
     
     # Extract covers
-    extract_all_covers(args.epubs_dir, args.output_dir, create_placeholders=not args.no_placeholders)
+    extract_all_covers(args.epubs_dir, args.output_dir, create_placeholders=not args.no_placeholders,
+                       svg_placeholders=args.svg_placeholders, force=args.force)
     
     return 0
 
@@ -10,35 +10,60 @@ Usage:
     python3 generate_catalog.py --epubs-dir ./epubs --output cloud_books_catalog.json
 
 Requirements:
-    pip install ebooklib
+    None (standard library only)
+    Optional: pip install orjson (faster catalog writing)
 """
 
 import argparse
 import json
 import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 try:
-    import ebooklib
-    from ebooklib import epub
-    EBOOKLIB_AVAILABLE = True
+    import orjson
+    ORJSON_AVAILABLE = True
 except ImportError:
-    EBOOKLIB_AVAILABLE = False
-    print("⚠️  Warning: ebooklib not installed. Install with: pip install ebooklib")
-    print("   Continuing with basic metadata extraction...")
+    ORJSON_AVAILABLE = False
 
 
-def get_file_size(filepath: Path) -> int:
-    """Get file size in bytes"""
-    return os.path.getsize(filepath)
+# XML namespaces used by EPUB container and package (OPF) documents
+CONTAINER_NS = "{urn:oasis:names:tc:opendocument:xmlns:container}"
+DC_NS = "{http://purl.org/dc/elements/1.1/}"
 
+# Cover image extensions, in order of preference (SVG placeholders last, raster covers win)
+COVER_EXTENSIONS = (".jpg", ".png", ".svg")
 
-def extract_epub_metadata(epub_path: Path) -> Dict[str, Optional[str]]:
+# Metadata cache file, kept in the EPUB directory
+METADATA_CACHE_NAME = ".metadata_cache.json"
+
+# Bump when extract_epub_metadata changes, so entries from older extractors are discarded
+METADATA_CACHE_VERSION = 2
+
+
+def _scan_epubs(epubs_dir: Path) -> List[os.DirEntry]:
+    """
+    List EPUB files in a directory, sorted by name. Dotfiles (e.g. macOS
+    ._name.epub AppleDouble files) are skipped. is_file() comes from the
+    directory listing for free; DirEntry.stat() still makes one stat call
+    on Linux (cached on the entry afterwards).
+    """
+    entries = [e for e in os.scandir(epubs_dir)
+               if e.is_file() and e.name.lower().endswith(".epub") and not e.name.startswith(".")]
+    return sorted(entries, key=lambda e: e.name)
+
+
+def extract_epub_metadata(epub_path: Path, warnings: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
     """
     Extract metadata from EPUB file.
     Returns dict with: title, author, language, description
+    Problems are appended to warnings if given, otherwise printed.
     """
     metadata = {
         "title": None,
@@ -47,57 +72,65 @@ def extract_epub_metadata(epub_path: Path) -> Dict[str, Optional[str]]:
         "description": None,
     }
     
-    if not EBOOKLIB_AVAILABLE:
-        # Fallback: use filename
-        metadata["title"] = epub_path.stem.replace("-", " ").replace("_", " ").title()
-        return metadata
-    
     try:
-        book = epub.read_epub(str(epub_path))
-        
-        # Extract title
-        title = book.get_metadata('DC', 'title')
-        if title:
-            metadata["title"] = title[0][0]
+        # Only the container and OPF documents are read; content documents are never parsed
+        with zipfile.ZipFile(epub_path) as z:
+            container = ET.fromstring(z.read('META-INF/container.xml'))
+            opf_path = container.find(f'.//{CONTAINER_NS}rootfile').get('full-path')
+            opf = ET.fromstring(z.read(opf_path))
         
-        # Extract author
-        creator = book.get_metadata('DC', 'creator')
-        if creator:
-            metadata["author"] = creator[0][0]
-        
-        # Extract language
-        language = book.get_metadata('DC', 'language')
-        if language:
-            metadata["language"] = language[0][0]
-        
-        # Extract description
-        description = book.get_metadata('DC', 'description')
-        if description:
-            metadata["description"] = description[0][0]
+        metadata["title"] = opf.findtext(f'.//{DC_NS}title')
+        metadata["author"] = opf.findtext(f'.//{DC_NS}creator')
+        metadata["language"] = opf.findtext(f'.//{DC_NS}language')
+        metadata["description"] = opf.findtext(f'.//{DC_NS}description')
             
     except Exception as e:
-        print(f"⚠️  Could not extract metadata from {epub_path.name}: {e}")
+        message = f"Could not extract metadata from {epub_path.name}: {e}"
+        if warnings is None:
+            print(f"⚠️  {message}")
+        else:
+            warnings.append(message)
         metadata["title"] = epub_path.stem.replace("-", " ").replace("_", " ").title()
     
     return metadata
 
 
-def guess_genre(title: str, author: str, tags: List[str]) -> str:
+def _extract_metadata_job(epub_path: Path) -> Tuple[Dict[str, Optional[str]], List[str]]:
+    """Worker-process wrapper for extract_epub_metadata: returns (metadata, warnings) for the parent to print"""
+    warnings = []
+    metadata = extract_epub_metadata(epub_path, warnings)
+    return metadata, warnings
+
+
+def _keyword_pattern(words: List[str]) -> "re.Pattern":
+    """Compile keywords into one pattern matching any of them as a substring"""
+    return re.compile("|".join(re.escape(word) for word in words))
+
+
+# Title keywords per genre, checked in order
+_GENRE_PATTERNS = [
+    ("Mystery", _keyword_pattern(["mystery", "detective", "murder", "crime"])),
+    ("Fantasy", _keyword_pattern(["fantasy", "wizard", "magic", "dragon"])),
+    ("Romance", _keyword_pattern(["romance", "love", "heart"])),
+    ("Horror", _keyword_pattern(["horror", "terror", "vampire", "zombie"])),
+    ("Science Fiction", _keyword_pattern(["science", "space", "robot", "future"])),
+]
+
+# Title keywords per age rating
+_CHILDREN_TITLE_PATTERN = _keyword_pattern(["children", "kid", "little", "pooh", "curious george"])
+_YOUNG_ADULT_TITLE_PATTERN = _keyword_pattern(["hardy boys", "nancy drew", "young"])
+
+
+def guess_genre(title: str, author: str, tags: List[str], title_lower: Optional[str] = None) -> str:
     """Guess genre based on title, author, or tags"""
-    title_lower = title.lower()
+    if title_lower is None:
+        title_lower = title.lower()
     author_lower = author.lower() if author else ""
     
     # Common patterns
-    if any(word in title_lower for word in ["mystery", "detective", "murder", "crime"]):
-        return "Mystery"
-    if any(word in title_lower for word in ["fantasy", "wizard", "magic", "dragon"]):
-        return "Fantasy"
-    if any(word in title_lower for word in ["romance", "love", "heart"]):
-        return "Romance"
-    if any(word in title_lower for word in ["horror", "terror", "vampire", "zombie"]):
-        return "Horror"
-    if any(word in title_lower for word in ["science", "space", "robot", "future"]):
-        return "Science Fiction"
+    for label, pattern in _GENRE_PATTERNS:
+        if pattern.search(title_lower):
+            return label
     if "children" in " ".join(tags).lower() or "kid" in title_lower:
         return "Children's Literature"
     
@@ -108,20 +141,21 @@ def guess_genre(title: str, author: str, tags: List[str]) -> str:
     return "Fiction"
 
 
-def guess_age_rating(title: str, genre: str, tags: List[str]) -> str:
+def guess_age_rating(title: str, genre: str, tags: List[str], title_lower: Optional[str] = None) -> str:
     """Guess appropriate age rating"""
-    title_lower = title.lower()
+    if title_lower is None:
+        title_lower = title.lower()
     genre_lower = genre.lower()
     tags_lower = " ".join(tags).lower()
     
     # Children indicators
-    if any(word in title_lower for word in ["children", "kid", "little", "pooh", "curious george"]):
+    if _CHILDREN_TITLE_PATTERN.search(title_lower):
         return "Children"
     if "children" in tags_lower or "picture book" in tags_lower:
         return "Children"
     
     # Young adult indicators
-    if any(word in title_lower for word in ["hardy boys", "nancy drew", "young"]):
+    if _YOUNG_ADULT_TITLE_PATTERN.search(title_lower):
         return "Young Adult"
     if "young adult" in tags_lower or "ya" in tags_lower:
         return "Young Adult"
@@ -133,17 +167,21 @@ def guess_age_rating(title: str, genre: str, tags: List[str]) -> str:
     return "Adult"
 
 
-def generate_book_entry(epub_path: Path, firebase_path: str = "epubs", covers_dir: Optional[Path] = None) -> Dict:
-    """Generate a book entry for the catalog"""
+def generate_book_entry(epub_path: Path, firebase_path: str = "epubs", covers_dir: Optional[Path] = None,
+                        metadata: Optional[Dict[str, Optional[str]]] = None,
+                        file_size: Optional[int] = None) -> Dict:
+    """Generate a book entry for the catalog (metadata and file size are looked up unless already given)"""
     
     # Extract metadata
-    metadata = extract_epub_metadata(epub_path)
+    if metadata is None:
+        metadata = extract_epub_metadata(epub_path)
     
     # Generate ID from filename
     book_id = epub_path.stem.lower()
     
     # Get file size
-    file_size = get_file_size(epub_path)
+    if file_size is None:
+        file_size = epub_path.stat().st_size
     
     # Generate tags based on metadata
     # Default tag for all cloud books is "Classic" (can be manually changed to "AI" if needed)
@@ -152,16 +190,19 @@ def generate_book_entry(epub_path: Path, firebase_path: str = "epubs", covers_di
     # Guess genre and age
     title = metadata.get("title") or epub_path.stem.replace("-", " ").title()
     author = metadata.get("author") or "Unknown"
-    genre = guess_genre(title, author, tags)
-    age = guess_age_rating(title, genre, tags)
+    title_lower = title.lower()
+    genre = guess_genre(title, author, tags, title_lower)
+    age = guess_age_rating(title, genre, tags, title_lower)
     
-    # Check if local cover exists
+    # Check if local cover exists (JPEG or SVG placeholder from extract_covers.py, or an older PNG)
     cover_image_url = None
     if covers_dir and covers_dir.exists():
-        cover_file = covers_dir / f"{book_id}.png"
-        if cover_file.exists():
-            # Use relative path for bundled covers
-            cover_image_url = f"BookCovers/{book_id}.png"
+        for ext in COVER_EXTENSIONS:
+            cover_file = covers_dir / f"{book_id}{ext}"
+            if cover_file.exists():
+                # Use relative path for bundled covers
+                cover_image_url = f"BookCovers/{book_id}{ext}"
+                break
     
     # Build book entry
     book = {
@@ -184,21 +225,14 @@ def generate_book_entry(epub_path: Path, firebase_path: str = "epubs", covers_di
 def create_collections(books: List[Dict]) -> List[Dict]:
     """Create collections based on genres and age groups"""
     
-    # Group by genre
-    genres = {}
-    for book in books:
-        genre = book["genre"]
-        if genre not in genres:
-            genres[genre] = []
-        genres[genre].append(book["id"])
-    
-    # Group by age
-    ages = {}
+    # Group by genre and age in one pass
+    genres = defaultdict(list)
+    ages = defaultdict(list)
+    all_ids = []
     for book in books:
-        age = book["age"]
-        if age not in ages:
-            ages[age] = []
-        ages[age].append(book["id"])
+        genres[book["genre"]].append(book["id"])
+        ages[book["age"]].append(book["id"])
+        all_ids.append(book["id"])
     
     collections = []
     sort_order = 0
@@ -210,7 +244,7 @@ def create_collections(books: List[Dict]) -> List[Dict]:
         "description": "Complete library collection",
         "sortOrder": sort_order,
         "coverImageUrl": None,
-        "bookIds": [b["id"] for b in books]
+        "bookIds": all_ids
     })
     sort_order += 1
     
@@ -244,18 +278,44 @@ def create_collections(books: List[Dict]) -> List[Dict]:
     return collections
 
 
-def generate_catalog(epubs_dir: Path, firebase_path: str = "epubs", covers_dir: Optional[Path] = None) -> Dict:
-    """Generate complete catalog from EPUB directory"""
+def _load_metadata_cache(cache_file: Path) -> Dict:
+    """Load cached EPUB metadata, or an empty cache if missing, unreadable or from another cache version"""
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != METADATA_CACHE_VERSION:
+        return {}
+    return data.get("books", {})
+
+
+def _save_metadata_cache(cache_file: Path, cache: Dict):
+    """Write cached EPUB metadata along with the cache version"""
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({"version": METADATA_CACHE_VERSION, "books": cache}, f, indent=2, ensure_ascii=False)
+
+
+def generate_catalog(epubs_dir: Path, firebase_path: str = "epubs", covers_dir: Optional[Path] = None,
+                     cache_file: Optional[Path] = None, use_cache: bool = True) -> Dict:
+    """
+    Generate complete catalog from EPUB directory.
+    If cache_file is given, metadata of EPUBs whose size and mtime are
+    unchanged since the last run is reused instead of re-extracted.
+    With use_cache=False every EPUB is re-extracted and the cache rewritten.
+    """
     
     print(f"📚 Scanning directory: {epubs_dir}")
     
     # Check for local covers
     if covers_dir and covers_dir.exists():
-        cover_count = len(list(covers_dir.glob("*.png")))
+        cover_count = sum(1 for e in os.scandir(covers_dir)
+                          if e.is_file() and os.path.splitext(e.name)[1] in COVER_EXTENSIONS)
         print(f"🖼️  Found {cover_count} local cover images in {covers_dir}")
     
     # Find all EPUB files
-    epub_files = list(epubs_dir.glob("*.epub"))
+    epub_entries = _scan_epubs(epubs_dir)
+    epub_files = [Path(e.path) for e in epub_entries]
     
     if not epub_files:
         print(f"❌ No EPUB files found in {epubs_dir}")
@@ -264,11 +324,50 @@ def generate_catalog(epubs_dir: Path, firebase_path: str = "epubs", covers_dir:
     print(f"📖 Found {len(epub_files)} EPUB files")
     print()
     
+    # Find EPUBs whose metadata isn't cached for their current size and mtime
+    cached = _load_metadata_cache(cache_file) if cache_file and use_cache else {}
+    # Only EPUBs still in the directory are carried over, so removed books drop out of the cache
+    cache = {}
+    keys = {}
+    stale = []
+    for epub_file, entry in zip(epub_files, epub_entries):
+        st = entry.stat()
+        book_id = epub_file.stem.lower()
+        keys[book_id] = [st.st_size, st.st_mtime_ns]
+        if cached.get(book_id, {}).get("key") == keys[book_id]:
+            cache[book_id] = cached[book_id]
+        else:
+            stale.append(epub_file)
+    
+    if cache_file and use_cache:
+        print(f"🗂️  Reusing cached metadata for {len(epub_files) - len(stale)} EPUB files")
+        print()
+    
+    # Extract metadata (in parallel, one worker process per CPU core)
+    extracted = {}
+    metadata_warnings = {}
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for epub_file, (metadata, warnings) in zip(stale, executor.map(_extract_metadata_job, stale, chunksize=4)):
+            book_id = epub_file.stem.lower()
+            extracted[book_id] = metadata
+            metadata_warnings[book_id] = warnings
+            # Don't cache the filename fallback used when extraction failed, so it is retried next run
+            if not warnings:
+                cache[book_id] = {"key": keys[book_id], "metadata": metadata}
+    
+    if cache_file:
+        _save_metadata_cache(cache_file, cache)
+    
     # Generate book entries
     books = []
-    for epub_file in sorted(epub_files):
+    for epub_file in epub_files:
         print(f"Processing: {epub_file.name}...")
-        book = generate_book_entry(epub_file, firebase_path, covers_dir)
+        book_id = epub_file.stem.lower()
+        for warning in metadata_warnings.get(book_id, []):
+            print(f"  ⚠️  {warning}")
+        metadata = extracted[book_id] if book_id in extracted else cache[book_id]["metadata"]
+        file_size = keys[book_id][0]
+        book = generate_book_entry(epub_file, firebase_path, covers_dir, metadata, file_size)
         books.append(book)
         print(f"  ✓ {book['title']} by {book['author']}")
         print(f"    Genre: {book['genre']}, Age: {book['age']}, Size: {book['fileSizeBytes']:,} bytes")
@@ -328,6 +427,11 @@ def main():
         action="store_true",
         help="Format JSON with indentation"
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached metadata and re-extract every EPUB (the cache is rewritten)"
+    )
     
     args = parser.parse_args()
     
@@ -337,7 +441,8 @@ def main():
         return 1
     
     # Generate catalog
-    catalog = generate_catalog(args.epubs_dir, args.firebase_path, args.covers_dir)
+    catalog = generate_catalog(args.epubs_dir, args.firebase_path, args.covers_dir,
+                               cache_file=args.epubs_dir / METADATA_CACHE_NAME, use_cache=not args.no_cache)
     
     if not catalog:
         return 1
@@ -346,11 +451,17 @@ def main():
     print()
     print(f"💾 Saving catalog to: {args.output}")
     
-    with open(args.output, 'w', encoding='utf-8') as f:
-        if args.pretty:
-            json.dump(catalog, f, indent=2, ensure_ascii=False)
-        else:
-            json.dump(catalog, f, ensure_ascii=False)
+    if ORJSON_AVAILABLE:
+        # orjson serializes straight to UTF-8 bytes
+        data = orjson.dumps(catalog, option=orjson.OPT_INDENT_2 if args.pretty else 0)
+        with open(args.output, 'wb') as f:
+            f.write(data)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            if args.pretty:
+                json.dump(catalog, f, indent=2, ensure_ascii=False)
+            else:
+                json.dump(catalog, f, ensure_ascii=False)
     
     print()
     print("✅ Catalog generated successfully!")